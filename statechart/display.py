@@ -24,6 +24,9 @@ from statechart import (ChoiceState, ConcurrentState, CompositeState, FinalState
 class Display:
     """Generate code of statechart models for common graphing languages."""
 
+    def __init__(self):
+        self._uuids = {}
+
     def plantuml(self, statechart):
         """
         Generate PlantUML code of a statechart model.
@@ -71,7 +74,7 @@ class Display:
                 states (List[State]): List of states within the statechart.
                 transitions (List[Transition]): List of transitions within the statechart.
         """
-        state.uuid = ''.join(('node_', str(uuid.uuid4()))).replace('-', '_')
+        self._uuids[state] = ''.join(('node_', str(uuid.uuid4()))).replace('-', '_')
         states.append(state)
 
         for transition in state.transitions:
@@ -131,7 +134,7 @@ class Display:
             List[str]: PlantUML description of the concurrent.
         """
         result = [
-            'state {uuid} as "{name}" {{'.format(uuid=concurrent.uuid, name=concurrent.name),
+            'state {uuid} as "{name}" {{'.format(uuid=self._uuids[concurrent], name=concurrent.name),
         ]
 
         for region in concurrent.regions:
@@ -159,7 +162,7 @@ class Display:
             List[str]: PlantUML description of the composite.
         """
         result = [
-            'state {uuid} as "{name}" {{'.format(uuid=composite.uuid, name=composite.name),
+            'state {uuid} as "{name}" {{'.format(uuid=self._uuids[composite], name=composite.name),
         ]
 
         result += self._puml_context(composite, states)
@@ -196,7 +199,7 @@ class Display:
                         result += self._puml_transition(transition)
 
         result += [
-            '[*] --> {uuid}'.format(uuid=context.initial_state.transitions[0].end.uuid),
+            '[*] --> {uuid}'.format(uuid=self._uuids[context.initial_state.transitions[0].end]),
         ]
 
         return result
@@ -217,11 +220,11 @@ class Display:
             pass
         elif isinstance(state, ChoiceState):
             result += [
-                'state {uuid} <<choice>>'.format(uuid=state.uuid)
+                'state {uuid} <<choice>>'.format(uuid=self._uuids[state])
             ]
         else:
             result += [
-                'state {uuid} as "{name}"'.format(uuid=state.uuid, name=self._gen_state_name(state))
+                'state {uuid} as "{name}"'.format(uuid=self._uuids[state], name=self._gen_state_name(state))
             ]
 
         return result
@@ -240,13 +243,13 @@ class Display:
 
         if isinstance(transition.start, InitialState):
             start = '[*]'
-            end = transition.end.uuid
+            end = self._uuids[transition.end]
         elif isinstance(transition.end, FinalState):
-            start = transition.start.uuid
+            start = self._uuids[transition.start]
             end = '[*]'
         else:
-            start = transition.start.uuid
-            end = transition.end.uuid
+            start = self._uuids[transition.start]
+            end = self._uuids[transition.end]
 
         result += [
             '{start} --> {end}{div}{event}{guard}{action}'.format(
@@ -15,8 +15,6 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
-import logging
-
 
 class Event:
     """
@@ -42,14 +40,17 @@ class Event:
         data Optional[dict]: Optional data dict.
     """
 
+    __slots__ = ('name', 'data')
+
     def __init__(self, name, data=None):
-        self._logger = logging.getLogger(self.__class__.__name__)
         self.name = name
         self.data = {} if data is None else data
 
     def __eq__(self, other):
+        if other is self:
+            return True
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return self.name == other.name and self.data == other.data
         return NotImplemented
 
     def __ne__(self, other):
@@ -58,7 +59,8 @@ class Event:
         return NotImplemented
 
     def __hash__(self):
-        return hash(tuple(sorted(self.__dict__.items())))
+        # The data dict is mutable and unhashable, equal events share a name.
+        return hash(self.name)
 
     def __repr__(self):
         return 'Event(name="%s", data=%r)' % (self.name, self.data)
@@ -29,6 +29,8 @@ class PseudoState(State):
         context (Context): The parent context that contains this state.
     """
 
+    __slots__ = ()
+
     def activate(self, metadata, event):
         """
         Activate the state.
@@ -38,6 +40,7 @@ class PseudoState(State):
             event (Event): Event which led to the transition into this state.
         """
         self.active = True
+        metadata.activate(self)
 
         if self.context:
             if not self.context.active:
@@ -55,6 +58,8 @@ class InitialState(PseudoState):
         context (Context): The parent context that contains this state.
     """
 
+    __slots__ = ()
+
     def __init__(self, context):
         super().__init__(name='Initial', context=context)
 
@@ -75,8 +80,8 @@ class InitialState(PseudoState):
             metadata (Metadata): Common statechart metadata.
             event (Event): Event which led to the transition into this state.
         """
-        super().activate(metadata=metadata, event=event)
-        self.dispatch(metadata=metadata, event=None)
+        super().activate(metadata, event)
+        self.dispatch(metadata, None)
 
     def dispatch(self, metadata, event):
         """
@@ -93,7 +98,7 @@ class InitialState(PseudoState):
         Raises:
             RuntimeError: If the state could not dispatch transition
         """
-        if super().dispatch(metadata=metadata, event=event):
+        if super().dispatch(metadata, event):
             return True
         else:
             raise RuntimeError('Initial state must be able to dispatch transition')
@@ -121,6 +126,8 @@ class InitialState(PseudoState):
 
 
 class ShallowHistoryState(PseudoState):
+    __slots__ = ('state',)
+
     def __init__(self, context):
         """
         Shallow history is a pseudo state representing the most recent
@@ -155,7 +162,7 @@ class ShallowHistoryState(PseudoState):
             metadata (Metadata): Common statechart metadata.
             event (Event): Event which led to the transition into this state.
         """
-        super().activate(metadata=metadata, event=event)
+        super().activate(metadata, event)
 
         if len(self.transitions) > 1:
             raise RuntimeError('History state cannot have more than 1 transition')
@@ -165,9 +172,13 @@ class ShallowHistoryState(PseudoState):
             metadata.transition.start = self
             metadata.transition.end = self.state
 
-            self.state.activate(metadata=metadata, event=event)
+            # The history state is transient, hand over to the restored state.
+            self.active = False
+            metadata.deactivate(self)
+
+            self.state.activate(metadata, event)
         else:
-            self.dispatch(metadata=metadata, event=None)
+            self.dispatch(metadata, None)
 
 
 class ChoiceState(PseudoState):
@@ -189,6 +200,8 @@ class ChoiceState(PseudoState):
         predefined "else" guard for every choice vertex.
     """
 
+    __slots__ = ()
+
     def __init__(self, context):
         super().__init__(name='Choice', context=context)
 
@@ -201,10 +214,10 @@ class ChoiceState(PseudoState):
             metadata (Metadata): Common statechart metadata.
             event (Event): Event which led to the transition into this state.
         """
-        super().activate(metadata=metadata, event=event)
+        super().activate(metadata, event)
 
         for transition in self.transitions:
-            if transition.execute(metadata=metadata, event=None):
+            if transition.execute(metadata, None):
                 break
         else:
             raise RuntimeError('No choice made due to guard conditions, '
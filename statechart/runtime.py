@@ -26,7 +26,56 @@ class Metadata:
     only when the state is active, otherwise it is deleted.
     """
 
+    _logger = logging.getLogger('Metadata')
+
     def __init__(self):
-        self._logger = logging.getLogger(self.__class__.__name__)
         self.event = None
         self.transition = None
+        self.active_by_name = {}
+
+    def activate(self, state):
+        """
+        Record a state as active.
+
+        Args:
+            state (State): State being activated.
+        """
+        states = self.active_by_name.get(state.name)
+
+        if states is None:
+            self.active_by_name[state.name] = {state}
+        else:
+            states.add(state)
+
+    def deactivate(self, state):
+        """
+        Record a state as no longer active.
+
+        Args:
+            state (State): State being deactivated.
+        """
+        states = self.active_by_name.get(state.name)
+
+        if states is not None:
+            states.discard(state)
+
+            if not states:
+                del self.active_by_name[state.name]
+
+    def clear(self):
+        """
+        Record that no states are active, e.g. when the statechart is stopped.
+        """
+        self.active_by_name.clear()
+
+    def is_active(self, state_name):
+        """
+        Check if any state with the given name is active.
+
+        Args:
+            state_name (str): Name of the state.
+
+        Returns:
+            True if a state with the given name is active.
+        """
+        return state_name in self.active_by_name
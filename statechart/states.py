@@ -16,9 +16,15 @@
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
 import logging
+import sys
+from collections import deque
+from itertools import chain
 
 from statechart.runtime import Metadata
 
+# Empty (guarded, unguarded) pair for events that trigger no transitions from a state.
+_NO_TRANSITIONS = ((), ())
+
 
 class State:
     """A State is a simple state that has no regions or submachine states.
@@ -31,6 +37,8 @@ class State:
     Attributes:
         name (str): State name used to identify this instance.
         context (Context): State's parent context.
+        transitions (List[Transition]): Outgoing transitions, in the order they
+            were added.
 
     Examples:
         * First create the parent context
@@ -46,26 +54,63 @@ class State:
 
     Note:
         Do not dispatch a synchronous event within the action (enter, do or
-        exit) functions. If you need to dispatch an event, do so using the
-        async_dispatch function of the statechart.
+        exit) functions. If you need to dispatch an event, queue it using the
+        post function of the statechart and dispatch it later with flush.
 
     Raises:
         RuntimeError: If the parent context is invalid.
             Only a state chart can have no parent context.
     """
 
-    def __init__(self, name, context):
-        self._logger = logging.getLogger(self.__class__.__name__)
+    __slots__ = ('name', 'context', 'transitions', 'active', '_transitions_by_event', '_ancestors', '_do_task')
+
+    # One logger per class, named after the class, shared by all of its instances.
+    _logger = logging.getLogger('State')
+
+    # Whether the class overrides the optional entry, do and exit actions. The
+    # no-op defaults are skipped when activating and deactivating.
+    _has_entry = False
+    _has_do = False
+    _has_exit = False
+
+    # Likewise whether the class overrides handle_internal, skipped when dispatching.
+    _has_handle_internal = False
+
+    # Cheaper than isinstance(state, FinalState) on the dispatch path.
+    _is_final = False
+
+    # Likewise for isinstance(state, Statechart) when building the hierarchy.
+    _is_statechart = False
 
-        self.name = name
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._logger = logging.getLogger(cls.__name__)
+        cls._has_entry = cls.entry is not State.entry
+        cls._has_do = cls.do is not State.do
+        cls._has_exit = cls.exit is not State.exit
+        cls._has_handle_internal = cls.handle_internal is not State.handle_internal
 
-        """Context can be null only for the statechart"""
-        if context is None and (not isinstance(self, Statechart)):
+    def __init__(self, name, context):
+        # Interned, since names are used as keys of the active state index. Only
+        # exact strings can be interned, str subclasses such as enums are kept.
+        self.name = sys.intern(name) if type(name) is str else name
+
+        # Context can be null only for the statechart.
+        if context is None and not self._is_statechart:
             raise RuntimeError('Context cannot be null')
 
         self.context = context
+
+        # Chain of states from the outermost state below the statechart down to this state.
+        if context is None or context._is_statechart:
+            self._ancestors = (self,)
+        else:
+            self._ancestors = context._ancestors + (self,)
+
         self.transitions = []
+        self._transitions_by_event = {}
         self.active = False
+        self._do_task = None
 
     def entry(self, event):
         """
@@ -91,6 +136,11 @@ class State:
 
         Args:
             event (Event): Event which led to the transition into this state.
+
+        Returns:
+            Optionally the started task, e.g. an asyncio.Task or a
+            concurrent.futures.Future. Its cancel method is called when this
+            state is deactivated. Results without a cancel method are ignored.
         """
         pass
 
@@ -122,10 +172,38 @@ class State:
         if transition is None:
             raise RuntimeError('Cannot add null transition')
 
-        if transition.guard:
-            self.transitions.insert(0, transition)
+        self.transitions.append(transition)
+
+        # Index transitions by the name of their event trigger so dispatch only
+        # visits transitions that can fire for the incoming event.
+        name = transition._event_name
+        buckets = self._transitions_by_event.get(name)
+
+        if buckets is None:
+            buckets = self._transitions_by_event[name] = ([], [])
+
+        guarded, unguarded = buckets
+
+        if transition.guard is not None:
+            guarded.append(transition)
         else:
-            self.transitions.append(transition)
+            unguarded.append(transition)
+
+    def _candidate_transitions(self, event):
+        """
+        Get the transitions that can fire for an event, in the order they are checked.
+
+        Args:
+            event (Event): Transition event trigger.
+
+        Returns:
+            Iterator over the transitions triggered by the event, the most recently
+            added guarded transitions first, followed by the unguarded transitions.
+        """
+        name = None if event is None else event.name
+        guarded, unguarded = self._transitions_by_event.get(name, _NO_TRANSITIONS)
+
+        return chain(reversed(guarded), unguarded)
 
     def activate(self, metadata, event):
         """
@@ -135,9 +213,11 @@ class State:
             metadata (Metadata): Common statechart metadata.
             event (Event): Event which led to the transition into this state.
         """
-        self._logger.info('Activate "%s"', self.name)
+        if self._logger.isEnabledFor(logging.INFO):
+            self._logger.info('Activate "%s"', self.name)
 
         self.active = True
+        metadata.activate(self)
 
         if self.context:
             if not self.context.active:
@@ -145,11 +225,15 @@ class State:
 
             self.context.current_state = self
 
-        if self.entry:
-            self.entry(event=event)
+        if self._has_entry:
+            self.entry(event)
+
+        if self._has_do:
+            task = self.do(event)
 
-        if self.do:
-            self.do(event=event)
+            # Keep the task only if it can be cancelled, other results are ignored.
+            if callable(getattr(task, 'cancel', None)):
+                self._do_task = task
 
     def deactivate(self, metadata, event):
         """
@@ -159,11 +243,18 @@ class State:
             metadata (Metadata): Common statechart metadata.
             event (Event): Event which led to the transition out of this state.
         """
-        self._logger.info('Deactivate "%s"', self.name)
+        if self._logger.isEnabledFor(logging.INFO):
+            self._logger.info('Deactivate "%s"', self.name)
+
+        if self._do_task is not None:
+            self._do_task.cancel()
+            self._do_task = None
 
-        self.exit(event=event)
+        if self._has_exit:
+            self.exit(event)
 
         self.active = False
+        metadata.deactivate(self)
 
     def dispatch(self, metadata, event):
         """
@@ -177,16 +268,14 @@ class State:
             True if transition executed, False if transition not allowed,
             due to mismatched event trigger or failed guard condition.
         """
-        self.handle_internal(event)
+        if self._has_handle_internal:
+            self.handle_internal(event)
 
-        status = False
-
-        for transition in self.transitions:
-            if transition.execute(metadata=metadata, event=event):
-                status = True
-                break
+        for transition in self._candidate_transitions(event):
+            if transition.execute(metadata, event):
+                return True
 
-        return status
+        return False
 
     def handle_internal(self, event):
         """
@@ -222,6 +311,9 @@ class Context(State):
         context (Context): The parent context that contains this state.
     """
 
+    # Keep a __dict__ so models can attach their child states as attributes.
+    __slots__ = ('initial_state', 'current_state', 'finished', '__dict__')
+
     def __init__(self, name, context):
         super().__init__(name=name, context=context)
         self.initial_state = None
@@ -236,17 +328,27 @@ class Context(State):
             metadata (Metadata): Common statechart metadata.
             event (Event): Event which led to the transition out of this state.
         """
-        super().deactivate(metadata=metadata, event=event)
+        super().deactivate(metadata, event)
         self.current_state = None
         self.finished = False
 
     def is_active(self, state_name):
-        if not self.active:
-            return False
-        elif self.name == state_name:
-            return True
-        else:
-            return self.current_state.is_active(state_name)
+        state = self
+
+        # Walk down the chain of nested contexts instead of recursing, handing
+        # over to any state that checks itself differently.
+        while type(state).is_active is Context.is_active:
+            if not state.active:
+                return False
+            elif state.name == state_name:
+                return True
+
+            state = state.current_state
+
+            if state is None:
+                return False
+
+        return state.is_active(state_name)
 
     def __repr__(self):
         return '%s(name="%s", active="%s", current state=%r, finished="%s")' % (
@@ -268,6 +370,10 @@ class FinalState(State):
             the final state.
     """
 
+    __slots__ = ()
+
+    _is_final = True
+
     def __init__(self, context):
         super().__init__(name='Final', context=context)
 
@@ -275,11 +381,11 @@ class FinalState(State):
         raise RuntimeError('Cannot add a transition from the final state')
 
     def activate(self, metadata, event):
-        super().activate(metadata=metadata, event=event)
+        super().activate(metadata, event)
         self.context.finished = True
 
     def deactivate(self, metadata, event):
-        super().deactivate(metadata=metadata, event=event)
+        super().deactivate(metadata, event)
         self.context.finished = False
 
 
@@ -293,6 +399,10 @@ class ConcurrentState(State):
         context (Context): The parent context that contains this state.
     """
 
+    # current_state is set to the most recently activated region. Keep a __dict__
+    # so models can attach their regions as attributes.
+    __slots__ = ('regions', 'current_state', '__dict__')
+
     def __init__(self, name, context):
         super().__init__(name, context)
         self.regions = []
@@ -318,10 +428,11 @@ class ConcurrentState(State):
             event (Event): Event which led to the transition into this state.
         """
         super().activate(metadata, event)
-        for inactive in [region for region in self.regions if not region.active]:
-            # Check if region is activated implicitly via incoming transition.
-            inactive.activate(metadata=metadata, event=event)
-            inactive.initial_state.activate(metadata=metadata, event=event)
+        for region in self.regions:
+            # Skip regions already activated implicitly via incoming transition.
+            if not region.active:
+                region.activate(metadata, event)
+                region.initial_state.activate(metadata, event)
 
     def deactivate(self, metadata, event):
         """
@@ -331,13 +442,11 @@ class ConcurrentState(State):
             metadata (Metadata): Common statechart metadata.
             event: Event which led to the transition out of this state.
         """
-        self._logger.info('Deactivate "%s"', self.name)
-
         for region in self.regions:
             if region.active:
-                region.deactivate(metadata=metadata, event=event)
+                region.deactivate(metadata, event)
 
-        super().deactivate(metadata=metadata, event=event)
+        super().deactivate(metadata, event)
 
     def dispatch(self, metadata, event):
         """
@@ -354,25 +463,25 @@ class ConcurrentState(State):
         if not self.active:
             raise RuntimeError('Inactive composite state attempting to dispatch transition')
 
-        self.handle_internal(event)
+        if self._has_handle_internal:
+            self.handle_internal(event)
 
         dispatched = False
 
-        """ Check if any of the child regions can handle the event """
+        # Every active region sees the event, orthogonal regions react independently.
         for region in self.regions:
-            if region.dispatch(metadata=metadata, event=event):
+            if region.dispatch(metadata, event):
                 dispatched = True
 
         if dispatched:
             return True
 
-        """ Check if this state can handle the event by itself """
-        for transition in self.transitions:
-            if transition.execute(metadata=metadata, event=event):
-                dispatched = True
-                break
+        # No region consumed the event, check if this state can handle it by itself.
+        for transition in self._candidate_transitions(event):
+            if transition.execute(metadata, event):
+                return True
 
-        return dispatched
+        return False
 
     @property
     def finished(self):
@@ -382,7 +491,11 @@ class ConcurrentState(State):
         Returns:
             True if all regions are finished.
         """
-        return all(region.finished for region in self.regions)
+        for region in self.regions:
+            if not region.finished:
+                return False
+
+        return True
 
     def is_active(self, state_name):
         if not self.active:
@@ -390,7 +503,11 @@ class ConcurrentState(State):
         elif self.name == state_name:
             return True
         else:
-            return any(region.is_active(state_name) for region in self.regions)
+            for region in self.regions:
+                if region.is_active(state_name):
+                    return True
+
+            return False
 
     def __repr__(self):
         return '%s(name="%s", active="%s", regions=%r, finished="%s")' % (
@@ -407,13 +524,34 @@ class CompositeState(Context):
         context (Context): The parent context that contains this state.
     """
 
+    __slots__ = ('history_state', '_local_transitions')
+
     def __init__(self, name, context):
         super().__init__(name=name, context=context)
         self.history_state = None
+        self._local_transitions = set()
 
         if isinstance(context, ConcurrentState):
             context.add_region(self)
 
+    def add_transition(self, transition):
+        """Add a transition from this state.
+
+        Transitions with guards are checked first. Whether the transition is
+        local is determined once here rather than on every dispatch.
+
+        Args:
+            transition (Transition): Transition to add, can be a normal or
+                internal transition.
+
+        Raises:
+            RuntimeError: If transition is invalid.
+        """
+        super().add_transition(transition)
+
+        if self._is_local_transition(transition):
+            self._local_transitions.add(transition)
+
     def activate(self, metadata, event):
         """
         Activate the state.
@@ -425,10 +563,12 @@ class CompositeState(Context):
             metadata (Metadata): Common statechart metadata.
             event: Event which led to the transition into this state.
         """
-        super().activate(metadata=metadata, event=event)
+        super().activate(metadata, event)
+
+        transition = metadata.transition
 
-        if metadata.transition and metadata.transition.end is self:
-            self.initial_state.activate(metadata=metadata, event=event)
+        if transition and transition.end is self:
+            self.initial_state.activate(metadata, event)
 
     def deactivate(self, metadata, event):
         """
@@ -444,13 +584,16 @@ class CompositeState(Context):
         """
         # If the composite state contains a history pseudostate, preserve the current active child
         # state in history, unless that state is a final state.
-        if self.history_state and not (isinstance(self.current_state, FinalState)):
-            self.history_state.state = self.current_state
+        current_state = self.current_state
+        history_state = self.history_state
 
-        if self.current_state.active:
-            self.current_state.deactivate(metadata=metadata, event=event)
+        if history_state and not current_state._is_final:
+            history_state.state = current_state
 
-        super().deactivate(metadata=metadata, event=event)
+        if current_state.active:
+            current_state.deactivate(metadata, event)
+
+        super().deactivate(metadata, event)
 
     def dispatch(self, metadata, event):
         """
@@ -467,17 +610,21 @@ class CompositeState(Context):
         if not self.active:
             raise RuntimeError('Inactive composite state attempting to dispatch transition')
 
-        self.handle_internal(event)
+        if self._has_handle_internal:
+            self.handle_internal(event)
+
+        current_state = self.current_state
 
         # See if the current child state can handle the event
-        if self.current_state is None and self.initial_state:
-            self.initial_state.activate(metadata=metadata, event=None)
-            self.current_state.activate(metadata=metadata, event=event)
+        if current_state is None and self.initial_state:
+            self.initial_state.activate(metadata, None)
+            current_state = self.current_state
+            current_state.activate(metadata, event)
 
-        dispatched = False
+        dispatched = current_state is not None and current_state.dispatch(metadata, event)
 
-        if self.current_state and self.current_state.dispatch(metadata=metadata, event=event):
-            dispatched = True
+        # Dispatching may have moved this state to a different child state.
+        current_state = self.current_state
 
         if dispatched:
             # If the substate dispatched the event and this state is no longer active, return.
@@ -486,19 +633,20 @@ class CompositeState(Context):
 
             # If the substate dispatched the event and reached a final state, continue to dispatch
             # any default transitions from this state.
-            if isinstance(self.current_state, FinalState):
+            if current_state._is_final:
                 event = None
             else:
                 return True
 
         # Since none of the child states can handle the event, let this state
         # try handling the event.
-        for transition in self.transitions:
-            # If transition is local, deactivate current state if transition is allowed.
-            if self._is_local_transition(transition) and transition.is_allowed(event=event):
-                self.current_state.deactivate(metadata=metadata, event=event)
+        for transition in self._candidate_transitions(event):
+            if transition.is_allowed(event):
+                # If transition is local, deactivate current state before firing it.
+                if transition in self._local_transitions:
+                    current_state.deactivate(metadata, event)
 
-            if transition.execute(metadata=metadata, event=event):
+                transition.fire(metadata, event)
                 return True
 
         return False
@@ -529,9 +677,14 @@ class Statechart(Context):
         name (str): An identifier for the model element.
     """
 
+    __slots__ = ('metadata', '_pending')
+
+    _is_statechart = True
+
     def __init__(self, name):
         super().__init__(name=name, context=None)
         self.metadata = Metadata()
+        self._pending = deque()
 
     def start(self):
         """
@@ -544,14 +697,14 @@ class Statechart(Context):
         """
         self._logger.info('Start "%s"', self.name)
         self.active = True
-        self.initial_state.activate(metadata=self.metadata, event=None)
+        self.initial_state.activate(self.metadata, None)
 
     def stop(self):
         """
         Stops the statemachine by deactivating statechart and thus all it's child states.
         """
         self._logger.info('Stop "%s"', self.name)
-        self.deactivate(metadata=self.metadata, event=None)
+        self.deactivate(self.metadata, None)
 
     def deactivate(self, metadata, event):
         """
@@ -562,8 +715,18 @@ class Statechart(Context):
             event (Event): Event which led to the transition out of this state.
         """
         self._logger.info('Deactivate "%s"', self.name)
+
+        # Exit the active child states so their flags, do tasks and the
+        # metadata's active name index all agree once stopped.
+        current_state = self.current_state
+
+        if current_state is not None and current_state.active:
+            current_state.deactivate(metadata, event)
+
         self.active = False
         self.current_state = None
+        metadata.clear()
+        self._pending.clear()
 
     def dispatch(self, event):
         """
@@ -575,9 +738,66 @@ class Statechart(Context):
         Returns:
             True if transition executed.
         """
-        self.handle_internal(event=event)
+        if self._has_handle_internal:
+            self.handle_internal(event)
+
+        return self.current_state.dispatch(self.metadata, event)
 
-        return self.current_state.dispatch(metadata=self.metadata, event=event)
+    def dispatch_many(self, events):
+        """
+        Dispatch a batch of events in order, e.g. when replaying queued events.
+
+        Args:
+            events (Iterable[Event]): Transition event triggers.
+
+        Returns:
+            A list with, for each event, True if a transition executed.
+        """
+        dispatch = self.dispatch
+        return [dispatch(event) for event in events]
+
+    def post(self, event):
+        """
+        Queue an event to be dispatched by the next flush. Safe to call from
+        within actions, where dispatching synchronously is not.
+
+        Args:
+            event (Event): Transition event trigger.
+        """
+        self._pending.append(event)
+
+    def flush(self):
+        """
+        Dispatch queued events in order until the queue is empty, including
+        events posted while flushing. If dispatching an event raises, the
+        events after it stay queued.
+
+        Returns:
+            A list with, for each event, True if a transition executed.
+        """
+        pending = self._pending
+        dispatch = self.dispatch
+        results = []
+
+        while pending:
+            results.append(dispatch(pending.popleft()))
+
+        return results
+
+    def is_active(self, state_name):
+        """
+        Check if the statechart or any of its active states has the given name.
+
+        Active states are tracked by name in the metadata, so this is a single
+        lookup rather than a walk of the active state hierarchy.
+
+        Args:
+            state_name (str): Name of the state.
+
+        Returns:
+            True if a state with the given name is active.
+        """
+        return self.active and (self.name == state_name or self.metadata.is_active(state_name))
 
     def active_states(self):
         states = []
@@ -16,10 +16,40 @@
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
 
+import inspect
 import logging
 from functools import partial
 
-from statechart import Event, Statechart
+from statechart import Event
+
+
+def _takes_event(func):
+    """
+    Check how a guard or action function must be called.
+
+    Args:
+        func (function): Guard or action function.
+
+    Returns:
+        True if the function accepts an event keyword argument, False if it
+        accepts no arguments, or None if its signature cannot be inspected.
+    """
+    try:
+        signature = inspect.signature(func)
+    except (TypeError, ValueError):
+        return None
+
+    try:
+        signature.bind(event=None)
+        return True
+    except TypeError:
+        pass
+
+    try:
+        signature.bind()
+        return False
+    except TypeError:
+        return None
 
 
 class Transition:
@@ -37,13 +67,17 @@ class Transition:
         event (Event|str): The event or event name that fires the transition.
         guard (function): A boolean predicate that  must be true for the
             transition to be fired. It is evaluated at the time the event is
-            dispatched.
+            dispatched. None if the transition is unguarded.
         action (function): An optional procedure to be performed when the
-            transition fires.
+            transition fires. None if there is no action.
     """
 
+    __slots__ = ('start', 'end', 'event', 'guard', 'action', 'activate', 'deactivate', '_event_name',
+                 '_guard_takes_event', '_action_takes_event')
+
+    _logger = logging.getLogger('Transition')
+
     def __init__(self, start, end, event=None, guard=None, action=None):
-        self._logger = logging.getLogger(self.__class__.__name__)
         self.start = start
         self.end = end
         self.event = event
@@ -53,19 +87,21 @@ class Transition:
         if isinstance(event, str):
             self.event = Event(event)
 
+        # Name of the triggering event, compared against dispatched events.
+        self._event_name = None if self.event is None else self.event.name
+
         if guard is not None and not callable(guard):
             raise ValueError('Guard must be callable')
 
         if action is not None and not callable(action):
             raise ValueError('Action must be callable')
 
-        """ Used to store the states that will get activated """
-        self.activate = list()
+        # Inspect the guard and action signatures once rather than on every call.
+        self._guard_takes_event = None if guard is None else _takes_event(guard)
+        self._action_takes_event = None if action is None else _takes_event(action)
 
-        """ Used to store the states that will get de-activated """
-        self.deactivate = list()
-
-        self._calculate_state_set(start=start, end=end)
+        # The states that will get activated and de-activated, fixed once calculated.
+        self.activate, self.deactivate = self._calculate_state_set(start=start, end=end)
 
         start.add_transition(self)
 
@@ -83,39 +119,47 @@ class Transition:
         Returns:
             True if the transition was executed.
         """
-        if not self.is_allowed(event=event):
+        if not self.is_allowed(event):
             return False
 
+        self.fire(metadata, event)
+
+        return True
+
+    def fire(self, metadata, event):
+        """
+        Execute the transition without checking if it is allowed.
+        Deactivate source states, perform transition action and activate all
+        target states.
+
+        Use when the caller has already checked the transition is allowed, so
+        the guard condition is evaluated only once.
+
+        Args:
+            metadata (Metadata): Common statechart metadata.
+            event (Event): The event that fires the transition.
+        """
         metadata.transition = self
 
-        if event:
-            self._logger.info('Transition from  "%s" to "%s" due to event trigger "%s"',
-                              self.start.name, self.end.name, event.name)
-        else:
-            self._logger.info('Default transition from  "%s" to "%s"',
-                              self.start.name, self.end.name)
+        if self._logger.isEnabledFor(logging.INFO):
+            if event is not None:
+                self._logger.info('Transition from  "%s" to "%s" due to event trigger "%s"',
+                                  self.start.name, self.end.name, event.name)
+            else:
+                self._logger.info('Default transition from  "%s" to "%s"',
+                                  self.start.name, self.end.name)
 
         for state in self.deactivate:
-            state.deactivate(metadata=metadata, event=event)
+            state.deactivate(metadata, event)
 
-        if self.action:
-            for func in [partial(self.action, event=event),
-                         self.action]:
-                try:
-                    func()
-                    break
-                except TypeError:
-                    pass
-            else:
-                raise RuntimeError('Unable to call action function')
+        if self.action is not None:
+            self._call(self.action, self._action_takes_event, event, 'Unable to call action function')
 
         for state in self.activate:
-            state.activate(metadata=metadata, event=event)
+            state.activate(metadata, event)
 
         metadata.transition = None
 
-        return True
-
     def is_allowed(self, event):
         """
         Check if the transition is allowed.
@@ -126,25 +170,41 @@ class Transition:
         Returns:
             True if the transition is allowed.
         """
-        try:
-            if (not self.event and not event) or (self.event.name == event.name):
-                pass
-            else:
-                return False
-        except AttributeError:
+        if (None if event is None else event.name) != self._event_name:
             return False
 
-        if self.guard:
-            for func in [partial(self.guard, event=event),
-                         self.guard]:
-                try:
-                    return func()
-                except TypeError:
-                    pass
-            else:
-                raise RuntimeError('Unable to call guard function')
+        if self.guard is not None:
+            return self._call(self.guard, self._guard_takes_event, event, 'Unable to call guard function')
         return True
 
+    @staticmethod
+    def _call(func, takes_event, event, error):
+        """
+        Call a guard or action function, passing the event if it accepts it.
+
+        Args:
+            func (function): Guard or action function.
+            takes_event (bool): Result of inspecting the function's signature.
+            event (Event): The event that fires the transition.
+            error (str): Error message if the function cannot be called.
+
+        Returns:
+            The result of the function.
+        """
+        if takes_event:
+            return func(event=event)
+        elif takes_event is not None:
+            return func()
+
+        # Signature unknown, probe whether the event can be passed.
+        for call in [partial(func, event=event), func]:
+            try:
+                return call()
+            except TypeError:
+                pass
+        else:
+            raise RuntimeError(error)
+
     def _calculate_state_set(self, start, end):
         """
         Calculate all the states which must be deactivated and then activated
@@ -154,49 +214,25 @@ class Transition:
             start (State): The originating state (or pseudostate) of the transition.
             end (State): The target state (or pseudostate) that is reached when the transition is
                 executed.
-        """
-        start_states = list()
-        end_states = list()
-
-        """ Recursively get all the context start states """
-        s = start
-        while s is not None:
-            start_states.insert(0, s)
-            context = s.context
-            if context and not isinstance(context, Statechart):
-                s = context
-            else:
-                s = None
-
-        """ Recursively get all the context end states """
-        e = end
-        while e is not None:
-            end_states.insert(0, e)
-            context = e.context
-            if context and not isinstance(context, Statechart):
-                e = context
-            else:
-                e = None
-
-        """ Get the Least Common Ancestor (LCA) of the start and end states """
-        min_state_count = min(len(start_states), len(end_states))
-        lca = min_state_count - 1
 
-        if start is not end:
+        Returns:
+            Tuples of the states to activate and the states to deactivate.
+        """
+        # Get the context chains of the start and end states, cached on each state.
+        start_states = start._ancestors
+        end_states = end._ancestors
+
+        # Get the Least Common Ancestor (LCA) of the start and end states. A self
+        # transition exits and re-enters the state.
+        if start is end:
+            lca = len(start_states) - 1
+        else:
             lca = 0
-            while lca < min_state_count:
-                if start_states[lca] is not end_states[lca]:
+            for start_state, end_state in zip(start_states, end_states):
+                if start_state is not end_state:
                     break
                 lca += 1
 
-        """ Starting from the LCA get the states that will be deactivated """
-        i = lca
-        while i < len(start_states):
-            self.deactivate.insert(0, start_states[i])
-            i += 1
-
-        """ Starting from the LCA get the states that will be activated """
-        i = lca
-        while i < len(end_states):
-            self.activate.append(end_states[i])
-            i += 1
+        # Starting from the LCA get the states that will be activated, and the
+        # states that will be deactivated innermost first.
+        return end_states[lca:], start_states[lca:][::-1]
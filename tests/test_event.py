@@ -50,3 +50,13 @@ class TestEvent:
 
         assert ev.name == name
         assert ev.data == data
+
+    def test_same_event_equal(self, event):
+        same_event = Event(name='event', data={'a': 1})
+
+        assert event == same_event
+        assert hash(event) == hash(same_event)
+
+    def test_event_slots(self, event):
+        with pytest.raises(AttributeError):
+            event.undeclared = True
@@ -27,3 +27,23 @@ def state():
     Transition(initial_state, next_state)
     statechart.start()
     return next_state
+
+
+class TestMetadata:
+    def test_is_active(self, state):
+        metadata = state.context.metadata
+
+        assert metadata.is_active('next')
+        assert not metadata.is_active('Initial')
+
+    def test_deactivate(self, state):
+        metadata = state.context.metadata
+        state.deactivate(metadata, None)
+
+        assert not metadata.is_active('next')
+
+    def test_clear(self, state):
+        metadata = state.context.metadata
+        metadata.clear()
+
+        assert not metadata.is_active('next')
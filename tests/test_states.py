@@ -15,6 +15,8 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
+import enum
+
 import pytest
 
 from statechart import (CompositeState, ConcurrentState, Event, FinalState,
@@ -89,6 +91,221 @@ class TestStatechart:
 
         assert statechart.finished
 
+    def test_context_is_active(self):
+        statechart = Statechart(name='statechart')
+        init = InitialState(statechart)
+
+        outer = CompositeState(name='outer', context=statechart)
+        outer_init = InitialState(outer)
+        concurrent = ConcurrentState(name='concurrent', context=outer)
+
+        region = CompositeState(name='region', context=concurrent)
+        region_init = InitialState(region)
+        region_state = State(name='region_state', context=region)
+
+        Transition(start=init, end=outer)
+        Transition(start=outer_init, end=concurrent)
+        Transition(start=region_init, end=region_state)
+
+        assert not outer.is_active('outer')
+
+        statechart.start()
+
+        assert outer.is_active('outer')
+        assert outer.is_active('concurrent')
+        assert outer.is_active('region_state')
+        assert not outer.is_active('statechart')
+        assert not region.is_active('outer')
+
+    def test_dispatch_many(self):
+        statechart = Statechart(name='statechart')
+        init = InitialState(statechart)
+        a = State(name='a', context=statechart)
+        b = State(name='b', context=statechart)
+
+        Transition(start=init, end=a)
+        Transition(start=a, end=b, event=Event('next'))
+
+        statechart.start()
+
+        assert statechart.dispatch_many([Event('unknown'), Event('next'), Event('next')]) == [False, True, False]
+        assert statechart.is_active('b')
+
+    def test_post_and_flush(self):
+        statechart = Statechart(name='statechart')
+
+        class PostingState(State):
+            def entry(self, event):
+                statechart.post(Event('next'))
+
+        init = InitialState(statechart)
+        a = State(name='a', context=statechart)
+        b = PostingState(name='b', context=statechart)
+        c = State(name='c', context=statechart)
+
+        Transition(start=init, end=a)
+        Transition(start=a, end=b, event=Event('next'))
+        Transition(start=b, end=c, event=Event('next'))
+
+        statechart.start()
+        statechart.post(Event('next'))
+
+        assert statechart.is_active('a')
+        assert statechart.flush() == [True, True]
+        assert statechart.is_active('c')
+        assert statechart.flush() == []
+
+    def test_flush_keeps_events_after_failure(self):
+        def fail():
+            raise ValueError('raised by the guard')
+
+        statechart = Statechart(name='statechart')
+        init = InitialState(statechart)
+        a = State(name='a', context=statechart)
+        b = State(name='b', context=statechart)
+
+        Transition(start=init, end=a)
+        Transition(start=a, end=b, event=Event('bad'), guard=fail)
+        Transition(start=a, end=b, event=Event('go'))
+
+        statechart.start()
+        statechart.post(Event('bad'))
+        statechart.post(Event('go'))
+
+        with pytest.raises(ValueError):
+            statechart.flush()
+
+        assert statechart.is_active('a')
+        assert statechart.flush() == [True]
+        assert statechart.is_active('b')
+
+    def test_do_task_cancelled_on_exit(self):
+        class Task:
+            cancelled = False
+
+            def cancel(self):
+                self.cancelled = True
+
+        task = Task()
+
+        class Busy(State):
+            def do(self, event):
+                return task
+
+        statechart = Statechart(name='statechart')
+        init = InitialState(statechart)
+        a = Busy(name='a', context=statechart)
+        b = State(name='b', context=statechart)
+
+        Transition(start=init, end=a)
+        Transition(start=a, end=b, event=Event('next'))
+
+        statechart.start()
+
+        assert not task.cancelled
+
+        statechart.dispatch(Event('next'))
+
+        assert task.cancelled
+
+    def test_do_task_cancelled_on_stop(self):
+        class Task:
+            cancelled = False
+
+            def cancel(self):
+                self.cancelled = True
+
+        task = Task()
+
+        class Busy(State):
+            def do(self, event):
+                return task
+
+        statechart = Statechart(name='statechart')
+        init = InitialState(statechart)
+        composite = CompositeState(name='composite', context=statechart)
+        composite_init = InitialState(composite)
+        busy = Busy(name='busy', context=composite)
+
+        Transition(start=init, end=composite)
+        Transition(start=composite_init, end=busy)
+
+        statechart.start()
+
+        assert not task.cancelled
+
+        statechart.stop()
+
+        assert task.cancelled
+        assert not busy.active
+
+    def test_do_result_without_cancel(self):
+        class Busy(State):
+            def do(self, event):
+                return True
+
+        statechart = Statechart(name='statechart')
+        init = InitialState(statechart)
+        a = Busy(name='a', context=statechart)
+        b = State(name='b', context=statechart)
+
+        Transition(start=init, end=a)
+        Transition(start=a, end=b, event=Event('next'))
+
+        statechart.start()
+        statechart.dispatch(Event('next'))
+
+        assert statechart.is_active('b')
+
+    def test_is_active_after_restart(self):
+        statechart = Statechart(name='statechart')
+        init = InitialState(statechart)
+        a = State(name='a', context=statechart)
+        b = State(name='b', context=statechart)
+
+        Transition(start=init, end=a)
+        Transition(start=a, end=b, event=Event('next'))
+
+        statechart.start()
+        statechart.dispatch(Event('next'))
+        assert statechart.is_active('b')
+
+        statechart.stop()
+        assert not statechart.is_active('b')
+
+        statechart.start()
+        assert statechart.is_active('a')
+        assert not statechart.is_active('b')
+
+        # Restart a chart with a concurrent state, whose regions must be
+        # deactivated on stop to be re-entered on start.
+        statechart = Statechart(name='concurrent statechart')
+        init = InitialState(statechart)
+        concurrent = ConcurrentState(name='concurrent', context=statechart)
+
+        region = CompositeState(name='region', context=concurrent)
+        region_init = InitialState(region)
+        x = State(name='x', context=region)
+        y = State(name='y', context=region)
+
+        Transition(start=init, end=concurrent)
+        Transition(start=region_init, end=x)
+        Transition(start=x, end=y, event=Event('go'))
+
+        statechart.start()
+        statechart.stop()
+
+        assert not x.active
+        assert not region.active
+        assert not concurrent.is_active('x')
+
+        statechart.start()
+
+        assert statechart.is_active('x')
+        assert concurrent.is_active('x')
+        assert statechart.dispatch(Event('go'))
+        assert statechart.is_active('y')
+
     def test_active_states(self):
         statechart = Statechart(name='a')
         statechart_init = InitialState(statechart)
@@ -118,6 +335,39 @@ class TestState:
         with pytest.raises(RuntimeError):
             State(name='anon', context=None)
 
+    def test_enum_state_name(self):
+        class Name(str, enum.Enum):
+            A = 'a'
+
+        statechart = Statechart(name='statechart')
+        init = InitialState(statechart)
+        a = State(name=Name.A, context=statechart)
+
+        Transition(start=init, end=a)
+        statechart.start()
+
+        assert a.name is Name.A
+        assert statechart.is_active(Name.A)
+        assert statechart.is_active('a')
+
+    def test_state_slots(self):
+        statechart = Statechart(name='statechart')
+        state = State(name='anon', context=statechart)
+        final = FinalState(statechart)
+
+        with pytest.raises(AttributeError):
+            state.undeclared = True
+
+        with pytest.raises(AttributeError):
+            final.undeclared = True
+
+    def test_context_attributes(self):
+        statechart = Statechart(name='statechart')
+        statechart.composite = CompositeState(name='composite', context=statechart)
+        statechart.composite.state = State(name='state', context=statechart.composite)
+
+        assert statechart.composite.state.context is statechart.composite
+
     def test_add_transition(self):
         statechart = Statechart(name='statechart')
         initial_state = InitialState(statechart)
@@ -127,6 +377,49 @@ class TestState:
 
         assert default_transition in initial_state.transitions
 
+    def test_dispatch_unhandled_event(self):
+        statechart = Statechart(name='statechart')
+        initial_state = InitialState(statechart)
+        a = State(name='a', context=statechart)
+        b = State(name='b', context=statechart)
+
+        Transition(start=initial_state, end=a)
+        Transition(start=a, end=b, event=Event('next'))
+
+        statechart.start()
+
+        assert not statechart.dispatch(Event('other'))
+        assert statechart.is_active('a')
+
+        assert statechart.dispatch(Event('next'))
+        assert statechart.is_active('b')
+
+    def test_actions_of_derived_subclass(self):
+        class Logged(State):
+            def entry(self, event):
+                self.calls.append('entry')
+
+            def do(self, event):
+                self.calls.append('do')
+
+        class Quiet(Logged):
+            def exit(self, event):
+                self.calls.append('exit')
+
+        statechart = Statechart(name='statechart')
+        initial_state = InitialState(statechart)
+        quiet = Quiet(name='quiet', context=statechart)
+        quiet.calls = []
+        end = State(name='end', context=statechart)
+
+        Transition(start=initial_state, end=quiet)
+        Transition(start=quiet, end=end, event=Event('next'))
+
+        statechart.start()
+        statechart.dispatch(Event('next'))
+
+        assert quiet.calls == ['entry', 'do', 'exit']
+
     def test_light_switch(self):
         """
                       --Flick-->
@@ -63,6 +63,14 @@ class TestTransition:
         assert initial_state in transition.deactivate
         assert next_state in transition.activate
 
+    def test_transition_slots(self, empty_statechart):
+        initial_state = InitialState(empty_statechart)
+        next_state = State(name='next', context=empty_statechart)
+        transition = Transition(start=initial_state, end=next_state)
+
+        with pytest.raises(AttributeError):
+            transition.undeclared = True
+
     def test_create_cyclic_transition(self, empty_statechart):
         next_state = State(name='next', context=empty_statechart)
         transition = Transition(start=next_state, end=next_state)
@@ -286,6 +294,62 @@ class TestTransition:
 
         assert sc.is_active('cs b')
 
+    def test_guarded_transition_checked_first(self, empty_statechart):
+        sc = empty_statechart
+        initial = InitialState(sc)
+        default = State(name='default', context=sc)
+        unguarded = State(name='unguarded', context=sc)
+        guarded = State(name='guarded', context=sc)
+
+        Transition(start=initial, end=default)
+        Transition(start=default, end=unguarded, event='next')
+        Transition(start=default, end=guarded, event='next', guard=lambda: True)
+
+        sc.start()
+        sc.dispatch(Event('next'))
+
+        assert sc.is_active('guarded')
+
+    def test_latest_guarded_transition_checked_first(self, empty_statechart):
+        sc = empty_statechart
+        initial = InitialState(sc)
+        default = State(name='default', context=sc)
+        first = State(name='first', context=sc)
+        second = State(name='second', context=sc)
+
+        Transition(start=initial, end=default)
+        Transition(start=default, end=first, event='next', guard=lambda: True)
+        Transition(start=default, end=second, event='next', guard=lambda: True)
+
+        sc.start()
+        sc.dispatch(Event('next'))
+
+        assert sc.is_active('second')
+
+    def test_local_transition_guard_evaluated_once(self, empty_statechart):
+        self.guard_calls = 0
+
+        def guard():
+            self.guard_calls += 1
+            return True
+
+        sc = empty_statechart
+        init = InitialState(sc)
+        cs = CompositeState(name='cs', context=sc)
+        cs_init = InitialState(cs)
+        cs_a = State(name='cs a', context=cs)
+        cs_b = State(name='cs b', context=cs)
+
+        Transition(start=init, end=cs)
+        Transition(start=cs_init, end=cs_a)
+        Transition(start=cs, end=cs_b, event='go', guard=guard)
+
+        sc.start()
+        sc.dispatch(Event('go'))
+
+        assert sc.is_active('cs b')
+        assert self.guard_calls == 1
+
     def test_transition_action_function(self, empty_statechart):
         self.state = False
 
@@ -346,3 +410,25 @@ class TestTransition:
         sc.dispatch(Event('next'))
 
         assert self.state
+
+    def test_transition_action_function_type_error(self, empty_statechart):
+        self.calls = 0
+
+        def fail(event):
+            self.calls += 1
+            raise TypeError('raised by the action')
+
+        sc = empty_statechart
+        initial = InitialState(sc)
+        default = State(name='default', context=sc)
+        next = State(name='next', context=sc)
+
+        Transition(start=initial, end=default)
+        Transition(start=default, end=next, event='next', action=fail)
+
+        sc.start()
+
+        with pytest.raises(TypeError, match='raised by the action'):
+            sc.dispatch(Event('next'))
+
+        assert self.calls == 1